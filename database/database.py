@@ -1,5 +1,6 @@
 import sqlite3
 import os
+from contextlib import contextmanager
 from datetime import datetime, date
 
 DB_PATH = os.environ.get(
@@ -15,6 +16,35 @@ def get_connection():
     return conn
 
 
+def get_bulk_connection():
+    """Connection tuned for a long scraper run.
+
+    WAL journal + NORMAL synchronous means a commit no longer forces an
+    fsync of the main database file. Pass the connection to the insert/
+    update helpers below and commit once per batch.
+    """
+    conn = get_connection()
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -20000")
+    return conn
+
+
+@contextmanager
+def _connection(conn=None):
+    """Yield conn if given (caller commits), else a fresh auto-committed one."""
+    if conn is not None:
+        yield conn
+        return
+    conn = get_connection()
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
 def init_db():
     conn = get_connection()
     cursor = conn.cursor()
@@ -72,6 +102,17 @@ def init_db():
         )
     """)
 
+    # Scrapers look companies up by LOWER(name) = LOWER(?) and dedupe
+    # signals on (company_id, source_url); index both so neither scans.
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_companies_name_lower
+        ON companies (LOWER(name))
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_signals_company_url
+        ON signals (company_id, source_url)
+    """)
+
     conn.commit()
     conn.close()
 
@@ -79,21 +120,19 @@ def init_db():
 # --- Companies ---
 
 def insert_company(name, description=None, sector=None, geography=None,
-                   city=None, website=None, stage=None, heat_score=1):
-    conn = get_connection()
+                   city=None, website=None, stage=None, heat_score=1,
+                   conn=None):
     today = date.today().isoformat()
-    cursor = conn.execute(
-        """INSERT INTO companies
-           (name, description, sector, geography, city, website, stage,
-            heat_score, first_detected, last_updated)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (name, description, sector, geography, city, website, stage,
-         heat_score, today, today)
-    )
-    company_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return company_id
+    with _connection(conn) as conn:
+        cursor = conn.execute(
+            """INSERT INTO companies
+               (name, description, sector, geography, city, website, stage,
+                heat_score, first_detected, last_updated)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (name, description, sector, geography, city, website, stage,
+             heat_score, today, today)
+        )
+        return cursor.lastrowid
 
 
 def get_company(company_id):
@@ -110,6 +149,17 @@ def get_all_companies():
     return [dict(r) for r in rows]
 
 
+def get_companies_by_name(conn=None):
+    """Return {lowercased name: company dict} for every company.
+
+    Lets a scraper resolve name matches in memory instead of one
+    SELECT per candidate. On duplicate names the oldest row wins.
+    """
+    with _connection(conn) as conn:
+        rows = conn.execute("SELECT * FROM companies ORDER BY id DESC").fetchall()
+    return {r["name"].lower(): dict(r) for r in rows}
+
+
 def get_company_by_name(name):
     conn = get_connection()
     row = conn.execute("SELECT * FROM companies WHERE name = ?", (name,)).fetchone()
@@ -117,36 +167,55 @@ def get_company_by_name(name):
     return dict(row) if row else None
 
 
-def update_company(company_id, **fields):
+def update_company(company_id, conn=None, **fields):
     if not fields:
         return
     fields["last_updated"] = date.today().isoformat()
     set_clause = ", ".join(f"{k} = ?" for k in fields)
     values = list(fields.values()) + [company_id]
-    conn = get_connection()
-    conn.execute(f"UPDATE companies SET {set_clause} WHERE id = ?", values)
-    conn.commit()
-    conn.close()
+    with _connection(conn) as conn:
+        conn.execute(f"UPDATE companies SET {set_clause} WHERE id = ?", values)
 
 
 # --- Signals ---
 
 def insert_signal(company_id, source_type=None, source_name=None,
                   source_url=None, signal_layer=None, title=None,
-                  metadata=None):
-    conn = get_connection()
-    cursor = conn.execute(
-        """INSERT INTO signals
-           (company_id, source_type, source_name, source_url,
-            signal_layer, title, metadata)
-           VALUES (?, ?, ?, ?, ?, ?, ?)""",
-        (company_id, source_type, source_name, source_url,
-         signal_layer, title, metadata)
-    )
-    signal_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return signal_id
+                  metadata=None, conn=None):
+    with _connection(conn) as conn:
+        cursor = conn.execute(
+            """INSERT INTO signals
+               (company_id, source_type, source_name, source_url,
+                signal_layer, title, metadata)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (company_id, source_type, source_name, source_url,
+             signal_layer, title, metadata)
+        )
+        return cursor.lastrowid
+
+
+def insert_signals(signals, conn=None):
+    """Bulk insert_signal: one executemany for a list of signal dicts.
+
+    Each dict takes the same keys as insert_signal's arguments.
+    """
+    columns = ("company_id", "source_type", "source_name", "source_url",
+               "signal_layer", "title", "metadata")
+    with _connection(conn) as conn:
+        conn.executemany(
+            """INSERT INTO signals
+               (company_id, source_type, source_name, source_url,
+                signal_layer, title, metadata)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            [tuple(s.get(c) for c in columns) for s in signals],
+        )
+
+
+def get_signal_keys(conn=None):
+    """Return the set of (company_id, source_url) pairs already stored."""
+    with _connection(conn) as conn:
+        rows = conn.execute("SELECT company_id, source_url FROM signals").fetchall()
+    return {(r[0], r[1]) for r in rows}
 
 
 def get_signals_for_company(company_id):
@@ -162,20 +231,35 @@ def get_signals_for_company(company_id):
 # --- Programs ---
 
 def insert_program(company_id, program_name=None, program_type=None,
-                   program_country=None, cohort=None, funding_amount=None):
-    conn = get_connection()
-    cursor = conn.execute(
-        """INSERT INTO programs
-           (company_id, program_name, program_type, program_country,
-            cohort, funding_amount)
-           VALUES (?, ?, ?, ?, ?, ?)""",
-        (company_id, program_name, program_type, program_country,
-         cohort, funding_amount)
-    )
-    program_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return program_id
+                   program_country=None, cohort=None, funding_amount=None,
+                   conn=None):
+    with _connection(conn) as conn:
+        cursor = conn.execute(
+            """INSERT INTO programs
+               (company_id, program_name, program_type, program_country,
+                cohort, funding_amount)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (company_id, program_name, program_type, program_country,
+             cohort, funding_amount)
+        )
+        return cursor.lastrowid
+
+
+def insert_programs(programs, conn=None):
+    """Bulk insert_program: one executemany for a list of program dicts.
+
+    Each dict takes the same keys as insert_program's arguments.
+    """
+    columns = ("company_id", "program_name", "program_type",
+               "program_country", "cohort", "funding_amount")
+    with _connection(conn) as conn:
+        conn.executemany(
+            """INSERT INTO programs
+               (company_id, program_name, program_type, program_country,
+                cohort, funding_amount)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            [tuple(p.get(c) for c in columns) for p in programs],
+        )
 
 
 def get_programs_for_company(company_id):
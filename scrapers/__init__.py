@@ -2,8 +2,48 @@
 Shared utilities for Athena scrapers.
 """
 
+import hashlib
+import json
+import os
+import re
+import threading
 import time
+from http.cookiejar import DefaultCookiePolicy
+
 import requests
+from requests.adapters import HTTPAdapter
+
+# Bodies + validators from earlier runs, for conditional GETs
+HTTP_CACHE_DIR = os.environ.get(
+    "HTTP_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 ".http_cache"),
+)
+
+
+_local = threading.local()
+
+
+def log(msg):
+    print(msg, flush=True)
+
+
+def _session():
+    """This thread's requests.Session, created on first use.
+
+    Reusing a session keeps TCP/TLS connections to the same host alive
+    between requests. Sessions are per thread because requests.Session
+    is not thread-safe, and they ignore cookies so fetch stays stateless.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session = session
+    return session
 
 
 def fetch(url, method="GET", headers=None, timeout=60, retries=3,
@@ -28,7 +68,7 @@ def fetch(url, method="GET", headers=None, timeout=60, retries=3,
     last_err = None
     for attempt in range(1, retries + 1):
         try:
-            resp = requests.request(
+            resp = _session().request(
                 method, url, headers=headers, timeout=timeout, **kwargs
             )
             resp.raise_for_status()
@@ -38,3 +78,181 @@ def fetch(url, method="GET", headers=None, timeout=60, retries=3,
             if attempt < retries:
                 time.sleep(retry_delay)
     raise last_err
+
+
+def fetch_cached(url, headers=None, params=None, **kwargs):
+    """GET a URL, revalidating the copy cached on disk by a previous run.
+
+    Sends If-None-Match / If-Modified-Since from the cached response; on
+    304 Not Modified the cached body is reused instead of downloading it
+    again. Only responses carrying an ETag or Last-Modified are cached.
+
+    Returns:
+        The response body as bytes.
+
+    Raises:
+        requests.RequestException if all retries fail.
+    """
+    url = requests.Request("GET", url, params=params).prepare().url
+    path = os.path.join(HTTP_CACHE_DIR, hashlib.sha1(url.encode()).hexdigest())
+    headers = dict(headers or {})
+    try:
+        with open(path + ".json") as f:
+            validators = json.load(f)
+        with open(path + ".body", "rb") as f:
+            body = f.read()
+    except (OSError, ValueError):
+        validators = None
+    else:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    resp = fetch(url, headers=headers, **kwargs)
+    if resp.status_code == 304 and validators is not None:
+        return body
+
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    if etag or last_modified:
+        try:
+            os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+            with open(path + ".body", "wb") as f:
+                f.write(resp.content)
+            with open(path + ".json", "w") as f:
+                json.dump({"etag": etag, "last_modified": last_modified}, f)
+        except OSError:
+            pass  # caching is best-effort; the body is still good
+    return resp.content
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing one call per `interval` seconds.
+
+    Call wait() before each request; concurrent callers are spaced out
+    so the overall request rate stays polite. Up to `burst` calls may go
+    through back to back after an idle spell, but the long-run rate
+    never exceeds one per interval. Time spent waiting on a response
+    counts towards the interval, so there is no idle gap after a slow
+    request.
+    """
+
+    def __init__(self, interval, burst=1):
+        self.interval = interval
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._next = 0.0  # next slot at the steady rate; up to burst - 1
+                          # slots may be taken early
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            delay = slot - (self.burst - 1) * self.interval - now
+            self._next = slot + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _word_alternation(names):
+    """Regex matching any of the literal names as whole words, longest first."""
+    names = sorted(map(re.escape, names), key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(names) + r")\b")
+
+
+def compile_geo_rules(cities, countries, ambiguous=(), aliases=None):
+    """Precompile a scraper's place tables for match_geo.
+
+    cities maps lowercase city names to their country; its order is the
+    priority when a text names several cities. Cities in `ambiguous`
+    (e.g. "nice", "bath") only match capitalized; every other name
+    matches case-insensitively. aliases maps lowercase country names to
+    their display form; other countries are title-cased.
+
+    Each table becomes one alternation, so a text is scanned once per
+    table instead of once per place.
+    """
+    plain = [c for c in cities if c not in ambiguous]
+    capitalized = [c.title() for c in cities if c in ambiguous]
+    return {
+        "cities": cities,
+        "priority": {city: i for i, city in enumerate(cities)},
+        "city_re": _word_alternation(plain),
+        "ambiguous_re": _word_alternation(capitalized) if capitalized else None,
+        "country_re": _word_alternation(countries),
+        # Every word of every place name; a text sharing none can't match
+        "words": frozenset(
+            word for name in (*cities, *countries) for word in name.split()
+        ),
+        "aliases": aliases or {},
+    }
+
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def match_geo(text, geo_rules):
+    """Return (country, city) for the places text names, else (None, None).
+
+    A city wins over a country, and among several cities the one listed
+    first wins. Case-insensitive names are matched against text.lower(),
+    so every hit is a key of the tables even for letters whose case
+    mapping is not one-to-one (Turkish İ/ı):
+
+        >>> rules = compile_geo_rules({"paris": "France"}, {"germany"})
+        >>> match_geo("Startup from Germany opens office in PARİS", rules)
+        ('Germany', None)
+        >>> match_geo("Berlın startup", rules)
+        (None, None)
+    """
+    if not text:
+        return None, None
+
+    # Cheap prefilter: most texts mention no European place at all
+    text_lower = text.lower()
+    if geo_rules["words"].isdisjoint(_WORD_RE.findall(text_lower)):
+        return None, None
+
+    cities = set(geo_rules["city_re"].findall(text_lower))
+    if geo_rules["ambiguous_re"] is not None:
+        cities.update(m.lower() for m in geo_rules["ambiguous_re"].findall(text))
+    if cities:
+        city = min(cities, key=geo_rules["priority"].__getitem__)
+        return geo_rules["cities"][city], city.title()
+
+    m = geo_rules["country_re"].search(text_lower)
+    if m:
+        country = m.group()
+        return geo_rules["aliases"].get(country, country.title()), None
+
+    return None, None
+
+
+def compile_sector_rules(rules):
+    """Fuse each sector's patterns into one regex over lowercased text.
+
+    Takes a SECTOR_RULES-style list of (sector, [patterns]) and keeps its
+    order as the priority: the first sector with any match wins, not the
+    leftmost match in the text.
+
+    Patterns are lowercased and compiled without re.IGNORECASE, which
+    keeps re on its much faster case-sensitive path; match_sector
+    lowercases the text once instead. The patterns must therefore not
+    rely on uppercase escapes like \\S or \\B.
+    """
+    return [
+        (sector, re.compile("|".join(patterns).lower()))
+        for sector, patterns in rules
+    ]
+
+
+def match_sector(text, compiled_rules):
+    """Return the first sector in compiled_rules matching text, or "Other"."""
+    if not text:
+        return "Other"
+    text_lower = text.lower()
+    for sector, rx in compiled_rules:
+        if rx.search(text_lower):
+            return sector
+    return "Other"
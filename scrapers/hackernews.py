@@ -11,18 +11,20 @@ import re
 import sys
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from urllib.parse import urlparse
 
 import requests
-from scrapers import fetch
+from scrapers import RateLimiter, fetch
 
 # Allow running as `python scrapers/hackernews.py` from project root
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.database import (
     init_db,
-    get_connection,
+    get_bulk_connection,
     insert_company,
     insert_signal,
     update_company,
@@ -34,6 +36,10 @@ HN_ITEM_BASE = "https://news.ycombinator.com/item?id="
 
 HITS_PER_PAGE = 100
 REQUEST_DELAY = 0.25  # seconds between API calls to be polite
+PROFILE_WORKERS = 4   # concurrent user-profile requests in Phase 2
+
+# Texts at least this long bypass the detect_* caches (huge story_texts)
+MAX_CACHED_TEXT = 4096
 
 # Primary queries — we keep ALL results from these
 PRIMARY_QUERIES = ["show hn", "launch hn"]
@@ -68,7 +74,7 @@ ARTICLE_PHRASES = [
 _ARTICLE_PHRASE_RE = re.compile("|".join(ARTICLE_PHRASES), re.IGNORECASE)
 
 # Domains that are media/blog/social — not company product sites
-NON_COMPANY_DOMAINS = {
+NON_COMPANY_DOMAINS = frozenset({
     # News & media
     "nytimes.com", "bbc.com", "bbc.co.uk", "theguardian.com",
     "reuters.com", "bloomberg.com", "techcrunch.com", "wired.com",
@@ -90,7 +96,7 @@ NON_COMPANY_DOMAINS = {
     # Misc
     "news.ycombinator.com", "imgur.com", "archive.org",
     "google.com", "apple.com", "microsoft.com", "amazon.com",
-}
+})
 
 
 def _is_show_or_launch(title):
@@ -124,12 +130,9 @@ def _is_non_company_domain(url):
     # Check exact match and parent domain (e.g. blog.nytimes.com)
     if domain in NON_COMPANY_DOMAINS:
         return True
-    parts = domain.split(".")
-    if len(parts) > 2:
-        parent = ".".join(parts[-2:])
-        if parent in NON_COMPANY_DOMAINS:
-            return True
-    return False
+    # Parent = last two labels; slice instead of split/join
+    i = domain.rfind(".", 0, domain.rfind("."))
+    return i != -1 and domain[i + 1:] in NON_COMPANY_DOMAINS
 
 
 def _should_keep_hit(hit):
@@ -179,15 +182,27 @@ SECTOR_RULES = [
     ("SaaS",         [r"\bSaaS\b", r"\bB2B\b", r"\bplatform\b"]),
 ]
 
+# One alternation per sector — keeps SECTOR_RULES order as the priority
+_SECTOR_UNION = [
+    (sector, re.compile("|".join(patterns), re.IGNORECASE))
+    for sector, patterns in SECTOR_RULES
+]
+
 
 def detect_sector(text):
     """Classify sector from title/description text."""
+    if len(text or "") < MAX_CACHED_TEXT:
+        return _detect_sector(text)
+    return _detect_sector.__wrapped__(text)
+
+
+@lru_cache(maxsize=2048)
+def _detect_sector(text):
     if not text:
         return "Other"
-    for sector, patterns in SECTOR_RULES:
-        for pat in patterns:
-            if re.search(pat, text, re.IGNORECASE):
-                return sector
+    for sector, rx in _SECTOR_UNION:
+        if rx.search(text):
+            return sector
     return "Other"
 
 # --- European geography data ---
@@ -277,39 +292,92 @@ EUROPEAN_CITIES = {
 # City names that are also common English words — require exact capitalization
 AMBIGUOUS_CITIES = {"nice", "bath", "reading", "hull", "cork", "essen", "split"}
 
+# Normalized names for country variants
+COUNTRY_ALIASES = {
+    "uk": "UK",
+    "united kingdom": "UK",
+    "czechia": "Czech Republic",
+}
+
+# Fold accented letters to ASCII so "München", "munchen" and "Munchen"
+# all hit the same pattern
+_ACCENT_TBL = str.maketrans({
+    "à": "a", "á": "a", "â": "a", "ã": "a", "ä": "a", "å": "a", "ă": "a",
+    "ç": "c", "č": "c", "ć": "c",
+    "è": "e", "é": "e", "ê": "e", "ë": "e", "ę": "e",
+    "ì": "i", "í": "i", "î": "i", "ï": "i",
+    "ñ": "n", "ń": "n",
+    "ò": "o", "ó": "o", "ô": "o", "õ": "o", "ö": "o", "ø": "o", "ő": "o",
+    "ù": "u", "ú": "u", "û": "u", "ü": "u", "ű": "u",
+    "ý": "y", "ÿ": "y",
+    "ł": "l", "ś": "s", "š": "s", "ș": "s", "ş": "s", "ț": "t", "ţ": "t",
+    "ž": "z", "ż": "z", "ź": "z", "ř": "r", "ğ": "g",
+    "œ": "oe", "æ": "ae", "ß": "ss",
+})
+
+# Folded city name -> (country, display name); the first spelling listed
+# in EUROPEAN_CITIES wins (e.g. "zurich"/"zürich" -> "Zurich")
+_FOLDED_CITIES = {}
+for _city, _country in EUROPEAN_CITIES.items():
+    _FOLDED_CITIES.setdefault(_city.translate(_ACCENT_TBL),
+                              (_country, _city.title()))
+
+# Word-boundary patterns compiled once at import:
+# (pattern, match_original_case, country, city) and (pattern, country).
+# Ambiguous cities only match their capitalized form (e.g. "Nice" not "nice").
+_CITY_RES = [
+    (re.compile(r'\b' + re.escape(city.title()) + r'\b'), True,
+     country, display)
+    if city in AMBIGUOUS_CITIES else
+    (re.compile(r'\b' + re.escape(city) + r'\b'), False,
+     country, display)
+    for city, (country, display) in _FOLDED_CITIES.items()
+]
+_COUNTRY_RES = [
+    (re.compile(r'\b' + re.escape(country) + r'\b'),
+     COUNTRY_ALIASES.get(country, country.title()))
+    for country in EUROPEAN_COUNTRIES
+]
+
+# Every word of every city/country name — a text sharing no word with this
+# set cannot match any pattern above
+_GEO_WORDS = frozenset(
+    word for name in (*_FOLDED_CITIES, *EUROPEAN_COUNTRIES)
+    for word in name.split()
+)
+_WORD_RE = re.compile(r"\w+")
+
 
 def detect_europe(text):
     """Check text for European country/city references.
 
     Returns (geography, city) or (None, None) if no match found.
     """
+    if len(text or "") < MAX_CACHED_TEXT:
+        return _detect_europe(text)
+    return _detect_europe.__wrapped__(text)
+
+
+@lru_cache(maxsize=2048)
+def _detect_europe(text):
     if not text:
         return None, None
 
-    text_lower = text.lower()
+    text_lower = text.lower().translate(_ACCENT_TBL)
+
+    # Cheap prefilter: most texts mention no European place at all
+    if _GEO_WORDS.isdisjoint(_WORD_RE.findall(text_lower)):
+        return None, None
 
     # Check cities first (more specific)
-    for city, country in EUROPEAN_CITIES.items():
-        if city in AMBIGUOUS_CITIES:
-            # Case-sensitive: only match capitalized form (e.g. "Nice" not "nice")
-            if re.search(r'\b' + re.escape(city.title()) + r'\b', text):
-                return country, city.title()
-        else:
-            if re.search(r'\b' + re.escape(city) + r'\b', text_lower):
-                return country, city.title()
+    for rx, original_case, country, city in _CITY_RES:
+        if rx.search(text if original_case else text_lower):
+            return country, city
 
     # Check countries
-    for country in EUROPEAN_COUNTRIES:
-        if re.search(r'\b' + re.escape(country) + r'\b', text_lower):
-            # Normalize common variants
-            normalized = country.title()
-            if country == "uk":
-                normalized = "UK"
-            elif country == "united kingdom":
-                normalized = "UK"
-            elif country == "czechia":
-                normalized = "Czech Republic"
-            return normalized, None
+    for rx, country in _COUNTRY_RES:
+        if rx.search(text_lower):
+            return country, None
 
     return None, None
 
@@ -336,16 +404,13 @@ def extract_domain(url):
         return None
 
 
-def find_existing_company(name, url):
+def find_existing_company(conn, name, url):
     """Check if a company already exists by name or URL domain."""
-    conn = get_connection()
-
     # Match by exact name (case-insensitive)
     row = conn.execute(
         "SELECT * FROM companies WHERE LOWER(name) = LOWER(?)", (name,)
     ).fetchone()
     if row:
-        conn.close()
         return dict(row)
 
     # Match by website domain
@@ -354,15 +419,21 @@ def find_existing_company(name, url):
         rows = conn.execute("SELECT * FROM companies WHERE website IS NOT NULL").fetchall()
         for r in rows:
             if extract_domain(r["website"]) == domain:
-                conn.close()
                 return dict(r)
 
-    conn.close()
     return None
 
 
+# Spaces out user-profile requests, across the Phase 2 threads
+_profile_limiter = RateLimiter(REQUEST_DELAY, burst=PROFILE_WORKERS)
+
+
 def fetch_user_about(username):
-    """Fetch a HN user's 'about' field for location detection."""
+    """Fetch a HN user's 'about' field for location detection.
+
+    Waits on the module-wide profile rate limiter to stay polite.
+    """
+    _profile_limiter.wait()
     try:
         resp = fetch(f"{HN_USER_URL}/{username}", timeout=15, retries=2,
                      retry_delay=2)
@@ -372,6 +443,16 @@ def fetch_user_about(username):
     return ""
 
 
+def fetch_user_abouts(usernames):
+    """Fetch 'about' fields for several HN users concurrently.
+
+    Returns {username: about}.
+    """
+    usernames = list(usernames)
+    with ThreadPoolExecutor(max_workers=PROFILE_WORKERS) as pool:
+        return dict(zip(usernames, pool.map(fetch_user_about, usernames)))
+
+
 def search_hn(query, since_ts):
     """Search HN Algolia API and paginate through all results."""
     all_hits = []
@@ -420,6 +501,7 @@ TLD_TO_COUNTRY = {
 }
 
 
+@lru_cache(maxsize=8192)
 def detect_europe_from_tld(url):
     """Check if URL uses a European country-code TLD."""
     domain = extract_domain(url)
@@ -459,7 +541,31 @@ def classify_hit(hit):
     return None, None
 
 
-def save_hit(hit, geography, city, user_cache):
+def classify_batch(hits):
+    """Filter and classify a list of hits in a single pass.
+
+    Returns (fast_matched, needs_lookup, skipped): fast_matched holds
+    (hit, geography, city) tuples resolved offline, needs_lookup holds
+    hits that still need a user-profile check, and skipped counts hits
+    rejected by _should_keep_hit.
+    """
+    fast_matched = []
+    needs_lookup = []
+    skipped = 0
+    keep, classify = _should_keep_hit, classify_hit
+    for hit in hits:
+        if not keep(hit):
+            skipped += 1
+            continue
+        geo, city = classify(hit)
+        if geo:
+            fast_matched.append((hit, geo, city))
+        else:
+            needs_lookup.append(hit)
+    return fast_matched, needs_lookup, skipped
+
+
+def save_hit(conn, hit, geography, city, user_cache):
     """Insert/update company + signal for one HN hit.
 
     Returns (company_name, is_new) or None if the hit has no usable name.
@@ -481,7 +587,6 @@ def save_hit(hit, geography, city, user_cache):
     # If geography still unknown, try author profile (uses cache)
     if not geography and author:
         if author not in user_cache:
-            time.sleep(REQUEST_DELAY)
             user_cache[author] = fetch_user_about(author)
         about = user_cache[author]
         geography, city = detect_europe(about)
@@ -493,7 +598,7 @@ def save_hit(hit, geography, city, user_cache):
     story_text = hit.get("story_text", "") or ""
     sector = detect_sector(title + " " + story_text)
 
-    existing = find_existing_company(company_name, url)
+    existing = find_existing_company(conn, company_name, url)
 
     metadata = json.dumps({
         "points": points,
@@ -513,7 +618,7 @@ def save_hit(hit, geography, city, user_cache):
             updates["geography"] = geography
             if city:
                 updates["city"] = city
-        update_company(company_id, **updates)
+        update_company(company_id, conn=conn, **updates)
         is_new = False
     else:
         company_id = insert_company(
@@ -523,6 +628,7 @@ def save_hit(hit, geography, city, user_cache):
             city=city,
             sector=sector,
             stage="Unknown",
+            conn=conn,
         )
         is_new = True
 
@@ -534,6 +640,7 @@ def save_hit(hit, geography, city, user_cache):
         signal_layer="realtime",
         title=title,
         metadata=metadata,
+        conn=conn,
     )
 
     return company_name, is_new
@@ -553,6 +660,7 @@ def main():
     args = parser.parse_args()
 
     init_db()
+    conn = get_bulk_connection()
 
     since = datetime.utcnow() - timedelta(days=30)
     since_ts = int(since.timestamp())
@@ -600,25 +708,13 @@ def main():
 
     log(f"\n  Total unique posts before filtering: {len(all_hits)}")
 
-    # Filter out non-company posts (articles, discussions, news links)
-    before = len(all_hits)
-    all_hits = [h for h in all_hits if _should_keep_hit(h)]
-    skipped = before - len(all_hits)
-    log(f"  Filtered out {skipped} non-company posts, {len(all_hits)} remaining")
+    # Filter out non-company posts (articles, discussions, news links) and
+    # run Phase 1 — fast, offline classification — in the same pass
+    fast_matched, needs_lookup, skipped = classify_batch(all_hits)
+    log(f"  Filtered out {skipped} non-company posts, "
+        f"{len(all_hits) - skipped} remaining")
 
     log(f"\nPhase 1: Fast classification (title / URL / story text)...")
-
-    # Phase 1 — fast, offline classification
-    fast_matched = []    # (hit, geography, city) — already resolved
-    needs_lookup = []    # hits that need a user-profile check
-
-    for hit in all_hits:
-        geo, city = classify_hit(hit)
-        if geo:
-            fast_matched.append((hit, geo, city))
-        else:
-            needs_lookup.append(hit)
-
     log(f"  {len(fast_matched)} matched from text/URL, "
         f"{len(needs_lookup)} need profile lookup")
 
@@ -626,10 +722,11 @@ def main():
     new_companies = 0
     updated_companies = 0
     user_cache = {}
+    _save_hit = save_hit  # bind once; the save loops below are hot
 
     # Process fast-matched hits first (no network calls)
     for hit, geo, city in fast_matched:
-        result = save_hit(hit, geo, city, user_cache)
+        result = _save_hit(conn, hit, geo, city, user_cache)
         if result is None:
             continue
         signals_count += 1
@@ -637,6 +734,7 @@ def main():
             new_companies += 1
         else:
             updated_companies += 1
+    conn.commit()
 
     log(f"  Saved {signals_count} fast-matched signals")
 
@@ -645,7 +743,7 @@ def main():
         log(f"\nSkipping profile lookups (--skip-profiles). "
             f"Saving {len(needs_lookup)} posts with geography=Unknown...")
         for hit in needs_lookup:
-            result = save_hit(hit, "Unknown", None, user_cache)
+            result = _save_hit(conn, hit, "Unknown", None, user_cache)
             if result is None:
                 continue
             signals_count += 1
@@ -655,8 +753,19 @@ def main():
                 updated_companies += 1
     else:
         log(f"\nPhase 2: Checking {len(needs_lookup)} author profiles...")
+        # Fetch each unique author once up front so the save loop below
+        # never blocks on the network; hits save_hit will drop for lack
+        # of a company name need no profile
+        authors = {
+            h.get("author") for h in needs_lookup
+            if h.get("author") and extract_company_name(h.get("title", ""))
+        }
+        authors -= user_cache.keys()
+        user_cache.update(fetch_user_abouts(authors))
+        log(f"  Fetched {len(authors)} unique author profiles")
+
         for i, hit in enumerate(needs_lookup, 1):
-            result = save_hit(hit, None, None, user_cache)
+            result = _save_hit(conn, hit, None, None, user_cache)
             if result is None:
                 continue
             signals_count += 1
@@ -668,6 +777,8 @@ def main():
             if i % 100 == 0:
                 log(f"  [{i}/{len(needs_lookup)}] profiles checked "
                     f"({len(user_cache)} cached)")
+    conn.commit()
+    conn.close()
 
     log(f"\nFound {signals_count} signals. "
         f"{new_companies} new companies added. "
@@ -9,19 +9,19 @@ description in the first <li> and website link in the second <li>.
 """
 
 import json
-import re
 import sys
 import os
 
 import requests
-from bs4 import BeautifulSoup
-from scrapers import fetch
+from bs4 import BeautifulSoup, SoupStrainer
+from scrapers import compile_sector_rules, fetch_cached, log, match_sector
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.database import (
     init_db,
-    get_connection,
+    get_bulk_connection,
+    get_companies_by_name,
     insert_company,
     insert_signal,
     insert_program,
@@ -32,6 +32,9 @@ PAGE_URL = (
     "https://www.imperial.ac.uk/admin-services/enterprise/"
     "about/data-and-reporting/spinout-portfolio/"
 )
+# Everything we read lives under this div; skip building the rest of the page
+PRIMARY_CONTENT = SoupStrainer("div", id="primary-content")
+
 HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -63,30 +66,12 @@ SECTOR_RULES = [
                       r"optic"]),
 ]
 
-
-def log(msg):
-    print(msg, flush=True)
-
-
-def find_existing(name):
-    """Check if company already exists by name (case-insensitive)."""
-    conn = get_connection()
-    row = conn.execute(
-        "SELECT * FROM companies WHERE LOWER(name) = LOWER(?)", (name,)
-    ).fetchone()
-    conn.close()
-    return dict(row) if row else None
+_SECTOR_UNION = compile_sector_rules(SECTOR_RULES)
 
 
 def detect_sector(description):
     """Keyword-based sector detection from description text."""
-    if not description:
-        return "Other"
-    for sector, patterns in SECTOR_RULES:
-        for pat in patterns:
-            if re.search(pat, description, re.IGNORECASE):
-                return sector
-    return "Other"
+    return match_sector(description, _SECTOR_UNION)
 
 
 def parse_companies(soup):
@@ -153,22 +138,27 @@ def main():
     # Fetch the page
     log(f"\nFetching {PAGE_URL}...")
     try:
-        resp = fetch(PAGE_URL, headers=HEADERS)
+        content = fetch_cached(PAGE_URL, headers=HEADERS)
     except requests.RequestException as e:
         log(f"ERROR: Failed to fetch page: {e}")
         return
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+    # Hand lxml the raw bytes so it sniffs the encoding itself
+    soup = BeautifulSoup(content, "lxml", parse_only=PRIMARY_CONTENT)
     companies = parse_companies(soup)
     log(f"  Found {len(companies)} spinout companies\n")
 
     new_count = 0
     existing_count = 0
 
+    # One connection and one transaction for the whole page
+    conn = get_bulk_connection()
+    existing_by_name = get_companies_by_name(conn)
+
     for data in companies:
         name = data["name"]
         sector = detect_sector(data["description"])
-        existing = find_existing(name)
+        existing = existing_by_name.get(name.lower())
 
         metadata = json.dumps({
             "source_page": PAGE_URL,
@@ -187,7 +177,8 @@ def main():
                 updates["geography"] = "UK"
             if not existing.get("city"):
                 updates["city"] = "London"
-            update_company(company_id, **updates)
+            update_company(company_id, conn=conn, **updates)
+            existing.update(updates)
             existing_count += 1
         else:
             company_id = insert_company(
@@ -199,7 +190,14 @@ def main():
                 website=data["website"],
                 stage="Pre-seed",
                 heat_score=2,
+                conn=conn,
             )
+            existing_by_name[name.lower()] = {
+                "id": company_id, "name": name,
+                "description": data["description"], "sector": sector,
+                "geography": "UK", "city": "London",
+                "website": data["website"],
+            }
             new_count += 1
 
         insert_signal(
@@ -210,6 +208,7 @@ def main():
             signal_layer="curated",
             title=f"{name} — Imperial College spinout",
             metadata=metadata,
+            conn=conn,
         )
 
         insert_program(
@@ -217,10 +216,14 @@ def main():
             program_name="Imperial Enterprise Lab",
             program_type="University Spin-off",
             program_country="UK",
+            conn=conn,
         )
 
         log(f"  {'NEW' if not existing else 'UPD'}  {name[:40]:40s}  {sector}")
 
+    conn.commit()
+    conn.close()
+
     log(f"\nImperial College: Found {len(companies)} spinouts. "
         f"{new_count} new, {existing_count} already existed.")
 
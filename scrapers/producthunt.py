@@ -9,24 +9,30 @@ city/country references.
 Fetches multiple category feeds: tech, AI, developer-tools, productivity.
 """
 
+import io
 import json
 import re
 import sys
 import os
-import time
-import xml.etree.ElementTree as ET
-from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 import requests
-from scrapers import fetch
+from lxml import etree
+from scrapers import (
+    RateLimiter, compile_geo_rules, compile_sector_rules, fetch_cached, log,
+    match_geo, match_sector,
+)
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.database import (
     init_db,
-    get_connection,
+    get_bulk_connection,
+    get_companies_by_name,
+    get_signal_keys,
     insert_company,
-    insert_signal,
+    insert_signals,
     update_company,
 )
 
@@ -49,10 +55,17 @@ CATEGORIES = [
     "fintech",
 ]
 
-REQUEST_DELAY = 1.0
+REQUEST_DELAY = 1.0  # min seconds between feed requests, across threads
+FEED_WORKERS = 4
 
 # Atom namespace
 ATOM_NS = {"atom": "http://www.w3.org/2005/Atom"}
+ATOM_ENTRY_TAG = "{%s}entry" % ATOM_NS["atom"]
+
+# External product link (/r/p/ redirect) inside an entry's <content>
+_PRODUCT_URL_RE = re.compile(
+    r'href=["\']?(https?://www\.producthunt\.com/r/[^"\'>\s]+)'
+)
 
 # --- European detection (shared with HN scraper) ---
 
@@ -92,6 +105,15 @@ EUROPEAN_CITIES = {
 
 AMBIGUOUS_CITIES = {"nice", "bath", "reading", "hull", "cork", "essen", "split"}
 
+COUNTRY_ALIASES = {
+    "uk": "UK",
+    "united kingdom": "UK",
+    "czechia": "Czech Republic",
+}
+
+_GEO_RULES = compile_geo_rules(EUROPEAN_CITIES, EUROPEAN_COUNTRIES,
+                               AMBIGUOUS_CITIES, COUNTRY_ALIASES)
+
 TLD_TO_COUNTRY = {
     "de": "Germany", "fr": "France", "nl": "Netherlands",
     "ch": "Switzerland", "se": "Sweden", "dk": "Denmark",
@@ -120,6 +142,8 @@ SECTOR_RULES = [
                       r"developer tool", r"infrastructure", r"\bAPI\b"]),
 ]
 
+_SECTOR_UNION = compile_sector_rules(SECTOR_RULES)
+
 # Map PH category slugs to sectors
 CATEGORY_TO_SECTOR = {
     "artificial-intelligence": "AI / ML",
@@ -128,99 +152,57 @@ CATEGORY_TO_SECTOR = {
 }
 
 
-def log(msg):
-    print(msg, flush=True)
-
-
 def detect_sector(text, category=None):
     """Classify sector from description text and feed category."""
     if category:
         sector = CATEGORY_TO_SECTOR.get(category)
         if sector:
             return sector
-    if not text:
-        return "Other"
-    for sector, patterns in SECTOR_RULES:
-        for pat in patterns:
-            if re.search(pat, text, re.IGNORECASE):
-                return sector
-    return "Other"
+    return match_sector(text, _SECTOR_UNION)
 
 
 def detect_europe_text(text):
     """Check text for European country/city references."""
-    if not text:
-        return None, None
-    text_lower = text.lower()
-
-    for city, country in EUROPEAN_CITIES.items():
-        if city in AMBIGUOUS_CITIES:
-            if re.search(r'\b' + re.escape(city.title()) + r'\b', text):
-                return country, city.title()
-        else:
-            if re.search(r'\b' + re.escape(city) + r'\b', text_lower):
-                return country, city.title()
+    # Taglines and authors repeat across overlapping category feeds
+    return _detect_europe_text(text or "")
+
 
-    for country in EUROPEAN_COUNTRIES:
-        if re.search(r'\b' + re.escape(country) + r'\b', text_lower):
-            normalized = country.title()
-            if country in ("uk", "united kingdom"):
-                normalized = "UK"
-            elif country == "czechia":
-                normalized = "Czech Republic"
-            return normalized, None
+@lru_cache(maxsize=4096)
+def _detect_europe_text(text):
+    return match_geo(text, _GEO_RULES)
 
-    return None, None
+
+def _hostname(url):
+    """Lowercased host of an absolute URL, stripping www.
+
+    Plain string slicing instead of urlparse, which is much slower and
+    handles far more than the product links we feed it.
+    """
+    i = url.find("//")
+    if i < 0:
+        return ""
+    host = url[i + 2:].split("/", 1)[0].split("?", 1)[0].split("#", 1)[0]
+    host = host.rpartition("@")[2].partition(":")[0].lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host
 
 
 def detect_europe_tld(url):
     """Check if URL uses a European country-code TLD."""
     if not url:
         return None
-    try:
-        host = urlparse(url).hostname or ""
-    except Exception:
-        return None
-    if host.startswith("www."):
-        host = host[4:]
+    host = _hostname(url)
     if host.endswith(".co.uk") or host.endswith(".org.uk"):
         return "UK"
-    tld = host.rsplit(".", 1)[-1] if host else ""
-    return TLD_TO_COUNTRY.get(tld)
+    return TLD_TO_COUNTRY.get(host.rpartition(".")[2])
 
 
 def extract_domain(url):
     """Extract hostname from URL, stripping www."""
     if not url:
         return None
-    try:
-        host = urlparse(url).hostname or ""
-        if host.startswith("www."):
-            host = host[4:]
-        return host.lower() if host else None
-    except Exception:
-        return None
-
-
-def find_existing(name):
-    """Check if company already exists by name (case-insensitive)."""
-    conn = get_connection()
-    row = conn.execute(
-        "SELECT * FROM companies WHERE LOWER(name) = LOWER(?)", (name,)
-    ).fetchone()
-    conn.close()
-    return dict(row) if row else None
-
-
-def has_signal(company_id, source_url):
-    """Check if a signal already exists for this company + URL."""
-    conn = get_connection()
-    row = conn.execute(
-        "SELECT id FROM signals WHERE company_id = ? AND source_url = ?",
-        (company_id, source_url),
-    ).fetchone()
-    conn.close()
-    return row is not None
+    return _hostname(url) or None
 
 
 # --- Feed parsing ---
@@ -267,17 +249,13 @@ def parse_entry(entry):
 
         # Extract tagline: first text before any HTML tags
         # Content format: "Tagline text<br>...<a href='...'>Discussion...</a>..."
-        tagline_match = re.match(r'^(.*?)(?:<|$)', content, re.DOTALL)
-        if tagline_match:
-            tagline = tagline_match.group(1).strip()
-            if tagline:
-                result["tagline"] = tagline
+        lt = content.find("<")
+        tagline = (content if lt < 0 else content[:lt]).strip()
+        if tagline:
+            result["tagline"] = tagline
 
         # Extract external product URL from /r/p/ redirect link
-        url_match = re.search(
-            r'href=["\']?(https?://www\.producthunt\.com/r/[^"\'>\s]+)',
-            content,
-        )
+        url_match = _PRODUCT_URL_RE.search(content)
         if url_match:
             result["product_url"] = url_match.group(1)
 
@@ -292,29 +270,42 @@ def fetch_feed(category=None):
         params["category"] = category
 
     try:
-        resp = fetch(url, params=params, headers=HEADERS)
+        content = fetch_cached(url, params=params, headers=HEADERS)
     except requests.RequestException as e:
         log(f"  ERROR fetching feed{f' ({category})' if category else ''}: {e}")
         return []
 
+    # Stream entries as they complete and free each one once parsed, so
+    # large <content> blobs never pile up in one tree
+    products = []
+    entries = etree.iterparse(io.BytesIO(content), events=("end",),
+                              tag=ATOM_ENTRY_TAG)
     try:
-        root = ET.fromstring(resp.content)
-    except ET.ParseError as e:
+        for _, entry in entries:
+            product = parse_entry(entry)
+            if product:
+                if category:
+                    product["topics"].append(category.replace("-", " ").title())
+                products.append(product)
+            entry.clear()
+            while entry.getprevious() is not None:
+                del entry.getparent()[0]
+    except etree.XMLSyntaxError as e:
         log(f"  ERROR parsing feed XML: {e}")
         return []
 
-    entries = root.findall("atom:entry", ATOM_NS)
-    products = []
-    for entry in entries:
-        product = parse_entry(entry)
-        if product:
-            if category:
-                product["topics"].append(category.replace("-", " ").title())
-            products.append(product)
-
     return products
 
 
+_feed_limiter = RateLimiter(REQUEST_DELAY)
+
+
+def fetch_feed_polite(category=None):
+    """fetch_feed, spaced out by the module-wide rate limiter."""
+    _feed_limiter.wait()
+    return fetch_feed(category)
+
+
 # --- Main ---
 
 def main():
@@ -325,46 +316,43 @@ def main():
 
     # Phase 1: Fetch all category feeds
     log("\nPhase 1: Fetching Atom feeds...")
-    all_products = []
-    seen_names = set()
+    products_by_key = {}  # lowercased name -> product, in first-seen order
+
+    # Fetch the default feed and all category feeds concurrently, then
+    # merge serially in a fixed order so results are deterministic
+    log(f"  Fetching default feed + {len(CATEGORIES)} category feeds...")
+    with ThreadPoolExecutor(max_workers=FEED_WORKERS) as pool:
+        default_products, *category_products = pool.map(
+            fetch_feed_polite, [None] + CATEGORIES
+        )
 
-    # Fetch default feed first
-    log(f"  Fetching default feed...")
-    default_products = fetch_feed()
     for p in default_products:
-        key = p["name"].lower()
-        if key not in seen_names:
-            seen_names.add(key)
-            all_products.append(p)
-    log(f"    {len(default_products)} entries, {len(all_products)} unique")
-
-    # Fetch category feeds
-    for cat in CATEGORIES:
-        time.sleep(REQUEST_DELAY)
-        log(f"  Fetching {cat} feed...")
-        products = fetch_feed(category=cat)
+        products_by_key.setdefault(p["name"].lower(), p)
+    log(f"    default: {len(default_products)} entries, "
+        f"{len(products_by_key)} unique")
+
+    for cat, products in zip(CATEGORIES, category_products):
         new = 0
         for p in products:
             key = p["name"].lower()
-            if key not in seen_names:
-                seen_names.add(key)
-                all_products.append(p)
+            existing = products_by_key.get(key)
+            if existing is None:
+                products_by_key[key] = p
                 new += 1
             else:
-                # Merge topic into existing entry
-                for existing in all_products:
-                    if existing["name"].lower() == key:
-                        for t in p["topics"]:
-                            if t not in existing["topics"]:
-                                existing["topics"].append(t)
-                        break
-        log(f"    {len(products)} entries, {new} new unique")
+                # Merge topics into existing entry, keeping first-seen order
+                existing["topics"] = list(
+                    dict.fromkeys(existing["topics"] + p["topics"])
+                )
+        log(f"    {cat}: {len(products)} entries, {new} new unique")
 
+    all_products = list(products_by_key.values())
     log(f"\n  Total unique products: {len(all_products)}")
 
     # Phase 2: Detect European products
     log("\nPhase 2: Filtering for European products...")
     european = []
+    non_european = []
     for p in all_products:
         # Check tagline text for European references
         geo, city = detect_europe_text(p["tagline"] or "")
@@ -383,16 +371,15 @@ def main():
             p["geography"] = geo
             p["city"] = city
             european.append(p)
+        else:
+            # Also keep products without geography (store as Unknown)
+            # so they're available for cross-layer matching
+            p["geography"] = "Unknown"
+            p["city"] = None
+            non_european.append(p)
 
     log(f"  {len(european)} European products identified")
 
-    # Also keep all products without geography (store as Unknown)
-    # so they're available for cross-layer matching
-    non_european = [p for p in all_products if p not in european]
-    for p in non_european:
-        p["geography"] = "Unknown"
-        p["city"] = None
-
     # Store European products + non-European for cross-layer potential
     to_store = european + non_european
     log(f"  Storing all {len(to_store)} products ({len(european)} European, "
@@ -404,13 +391,19 @@ def main():
     existing_count = 0
     skipped_signals = 0
 
+    # One connection and one transaction for the whole run
+    conn = get_bulk_connection()
+    existing_by_name = get_companies_by_name(conn)
+    existing_signals = get_signal_keys(conn)
+    new_signals = []  # written with one executemany after the loop
+
     for p in to_store:
         name = p["name"]
         tagline = p["tagline"]
         sector = detect_sector(tagline, p["topics"][0].lower().replace(" ", "-")
                                if p["topics"] else None)
 
-        existing = find_existing(name)
+        existing = existing_by_name.get(name.lower())
 
         metadata = json.dumps({
             "topics": p["topics"],
@@ -424,7 +417,7 @@ def main():
             company_id = existing["id"]
 
             # Skip if signal already exists for this PH URL
-            if has_signal(company_id, ph_url):
+            if (company_id, ph_url) in existing_signals:
                 skipped_signals += 1
                 continue
 
@@ -437,7 +430,8 @@ def main():
                 updates["geography"] = p["geography"]
                 if p["city"]:
                     updates["city"] = p["city"]
-            update_company(company_id, **updates)
+            update_company(company_id, conn=conn, **updates)
+            existing.update(updates)
             existing_count += 1
         else:
             company_id = insert_company(
@@ -448,18 +442,29 @@ def main():
                 city=p["city"],
                 stage="Unknown",
                 heat_score=1,
+                conn=conn,
             )
+            existing_by_name[name.lower()] = {
+                "id": company_id, "name": name, "description": tagline,
+                "sector": sector, "geography": p["geography"],
+                "city": p["city"],
+            }
             new_count += 1
 
-        insert_signal(
-            company_id=company_id,
-            source_type="producthunt",
-            source_name="ProductHunt",
-            source_url=ph_url,
-            signal_layer="realtime",
-            title=f"{name} — ProductHunt launch",
-            metadata=metadata,
-        )
+        new_signals.append({
+            "company_id": company_id,
+            "source_type": "producthunt",
+            "source_name": "ProductHunt",
+            "source_url": ph_url,
+            "signal_layer": "realtime",
+            "title": f"{name} — ProductHunt launch",
+            "metadata": metadata,
+        })
+        existing_signals.add((company_id, ph_url))
+
+    insert_signals(new_signals, conn=conn)
+    conn.commit()
+    conn.close()
 
     log(f"\nProductHunt: Found {len(all_products)} products total. "
         f"{len(european)} European. "
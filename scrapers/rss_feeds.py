@@ -6,24 +6,32 @@ EU-Startups, TechCrunch) to extract company signals from articles
 published in the last 30 days.
 """
 
+import io
 import json
 import re
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from html import unescape
 
 import feedparser
 import requests
-from scrapers import fetch
+from scrapers import (
+    compile_geo_rules, compile_sector_rules, fetch_cached, match_geo,
+    match_sector,
+)
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.database import (
     init_db,
-    get_connection,
+    get_bulk_connection,
+    get_companies_by_name,
+    get_signal_keys,
     insert_company,
-    insert_signal,
+    insert_signals,
     update_company,
 )
 
@@ -56,6 +64,9 @@ FEEDS = [
 
 CUTOFF_DAYS = 30
 
+# Texts at least this long bypass the detect_* caches (full article bodies)
+MAX_CACHED_TEXT = 10_000
+
 # --- Company name extraction patterns ---
 
 # Note: These patterns are intentionally NOT re.IGNORECASE so that
@@ -106,6 +117,19 @@ VERB_RE = re.compile(
 
 NAME_PATTERNS = [FUNDING_RE, LAUNCH_RE, VERB_RE, DESCRIPTION_RE]
 
+# All of NAME_PATTERNS as one anchored alternation, one capture group per
+# pattern. Alternatives are tried in order, so m.lastindex tells which
+# pattern matched first — and most titles are rejected in a single match.
+NAME_RE = re.compile("|".join(f"(?:{p.pattern})" for p in NAME_PATTERNS))
+
+# "Mining startup Hades" → "Hades"
+_STARTUP_STRIP_RE = re.compile(
+    r'^(?:\w+\s+)?(?:startup|company|firm|venture)\s+', re.IGNORECASE,
+)
+
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+
 # Words that are NOT company names (false positive filter)
 NOT_COMPANY = {
     "the", "a", "an", "this", "these", "here", "how", "why", "what",
@@ -161,6 +185,15 @@ EUROPEAN_CITIES = {
 
 AMBIGUOUS_CITIES = {"nice", "bath", "reading", "hull", "cork", "essen", "split"}
 
+COUNTRY_ALIASES = {
+    "uk": "UK",
+    "united kingdom": "UK",
+    "czechia": "Czech Republic",
+}
+
+_GEO_RULES = compile_geo_rules(EUROPEAN_CITIES, EUROPEAN_COUNTRIES,
+                               AMBIGUOUS_CITIES, COUNTRY_ALIASES)
+
 # --- Sector detection ---
 
 SECTOR_RULES = [
@@ -178,45 +211,34 @@ SECTOR_RULES = [
                       r"developer tool", r"infrastructure", r"\bAPI\b"]),
 ]
 
+_SECTOR_UNION = compile_sector_rules(SECTOR_RULES)
+
 
 def log(msg):
     print(msg, flush=True)
 
 
 def detect_sector(text):
-    if not text:
-        return "Other"
-    for sector, patterns in SECTOR_RULES:
-        for pat in patterns:
-            if re.search(pat, text, re.IGNORECASE):
-                return sector
-    return "Other"
+    if len(text or "") < MAX_CACHED_TEXT:
+        return _detect_sector(text)
+    return _detect_sector.__wrapped__(text)
+
+
+@lru_cache(maxsize=4096)
+def _detect_sector(text):
+    return match_sector(text, _SECTOR_UNION)
 
 
 def detect_europe(text):
     """Check text for European country/city references."""
-    if not text:
-        return None, None
-    text_lower = text.lower()
-
-    for city, country in EUROPEAN_CITIES.items():
-        if city in AMBIGUOUS_CITIES:
-            if re.search(r'\b' + re.escape(city.title()) + r'\b', text):
-                return country, city.title()
-        else:
-            if re.search(r'\b' + re.escape(city) + r'\b', text_lower):
-                return country, city.title()
+    if len(text or "") < MAX_CACHED_TEXT:
+        return _detect_europe(text)
+    return _detect_europe.__wrapped__(text)
 
-    for country in EUROPEAN_COUNTRIES:
-        if re.search(r'\b' + re.escape(country) + r'\b', text_lower):
-            normalized = country.title()
-            if country in ("uk", "united kingdom"):
-                normalized = "UK"
-            elif country == "czechia":
-                normalized = "Czech Republic"
-            return normalized, None
 
-    return None, None
+@lru_cache(maxsize=4096)
+def _detect_europe(text):
+    return match_geo(text, _GEO_RULES)
 
 
 def extract_company_name(title):
@@ -230,25 +252,34 @@ def extract_company_name(title):
     # Clean HTML entities
     title = unescape(title).strip()
 
-    for pattern in NAME_PATTERNS:
-        m = pattern.match(title)
+    m = NAME_RE.match(title)
+    if not m:
+        return None
+
+    # Earlier patterns can't match; later ones are only tried if this
+    # candidate gets rejected below
+    first = m.lastindex - 1
+    for i in range(first, len(NAME_PATTERNS)):
+        if i > first:
+            m = NAME_PATTERNS[i].match(title)
         if m:
-            name = m.group(1).strip()
+            name = m.group(m.lastindex).strip()
+            words = name.split()
 
             # Strip "X startup" prefix: "Mining startup Hades" → "Hades"
-            startup_strip = re.sub(
-                r'^(?:\w+\s+)?(?:startup|company|firm|venture)\s+',
-                '', name, flags=re.IGNORECASE,
-            ).strip()
-            if startup_strip and startup_strip[0].isupper():
-                name = startup_strip
+            # (needs at least two words, so one-word names skip the regex)
+            if len(words) > 1:
+                startup_strip = _STARTUP_STRIP_RE.sub('', name).strip()
+                if startup_strip and startup_strip[0].isupper():
+                    name = startup_strip
+                    words = name.split()
 
             # Reject names that are too long (likely sentence fragments)
-            if len(name.split()) > 3:
+            if len(words) > 3:
                 continue
 
             # Validate: not a common word, at least 2 chars, starts with capital
-            first_word = name.split()[0].lower()
+            first_word = words[0].lower()
             if (name.lower() not in NOT_COMPANY
                     and first_word not in NOT_COMPANY
                     and len(name) >= 2
@@ -262,9 +293,7 @@ def strip_html(text):
     """Remove HTML tags from text."""
     if not text:
         return ""
-    clean = re.sub(r'<[^>]+>', ' ', text)
-    clean = unescape(clean)
-    return re.sub(r'\s+', ' ', clean).strip()
+    return _WS_RE.sub(' ', unescape(_HTML_TAG_RE.sub(' ', text))).strip()
 
 
 def parse_date(entry):
@@ -282,47 +311,49 @@ def parse_date(entry):
     return None
 
 
-def find_existing(name):
-    conn = get_connection()
-    row = conn.execute(
-        "SELECT * FROM companies WHERE LOWER(name) = LOWER(?)", (name,)
-    ).fetchone()
-    conn.close()
-    return dict(row) if row else None
+def fetch_feed(feed_config):
+    """Download and parse a single RSS feed.
+
+    Returns the feedparser result, or None (after logging) on failure.
+    """
+    name = feed_config["name"]
+    try:
+        # Conditional GET: an unchanged feed comes back as a 304. Links
+        # inside summaries are stripped anyway, so skip resolving them.
+        # Wrapped in BytesIO: given raw bytes, feedparser first tries to
+        # open() them as a filename.
+        body = fetch_cached(feed_config["url"])
+        feed = feedparser.parse(io.BytesIO(body), resolve_relative_uris=False)
+    except (requests.RequestException, Exception) as e:
+        log(f"    ERROR: Failed to fetch/parse {name}: {e}")
+        return None
 
+    if feed.bozo and not feed.entries:
+        log(f"    ERROR: {name} feed parsing failed: {feed.bozo_exception}")
+        return None
+    return feed
 
-def has_signal(company_id, source_url):
-    conn = get_connection()
-    row = conn.execute(
-        "SELECT id FROM signals WHERE company_id = ? AND source_url = ?",
-        (company_id, source_url),
-    ).fetchone()
-    conn.close()
-    return row is not None
 
+def process_feed(feed_config, feed, conn, existing_by_name,
+                 existing_signals):
+    """Extract company signals from a feed returned by fetch_feed.
 
-def process_feed(feed_config):
-    """Parse a single RSS feed and extract company signals.
+    existing_by_name ({lowercased name: company}) and existing_signals
+    ({(company_id, source_url)}) are shared across feeds and updated in
+    place. Writes go through conn and are committed at the end.
 
     Returns (articles_parsed, signals_created, new_companies, errors).
     """
     name = feed_config["name"]
-    url = feed_config["url"]
     source_name = feed_config["source_name"]
     default_european = feed_config["default_european"]
 
-    log(f"\n  Fetching {name}: {url}")
-
-    try:
-        resp = fetch(url)
-        feed = feedparser.parse(resp.content)
-    except (requests.RequestException, Exception) as e:
-        log(f"    ERROR: Failed to fetch/parse feed: {e}")
+    if feed is None:
         return 0, 0, 0, 1
 
-    if feed.bozo and not feed.entries:
-        log(f"    ERROR: Feed parsing failed: {feed.bozo_exception}")
-        return 0, 0, 0, 1
+    # One transaction per feed; new signals are written with one
+    # executemany after the loop
+    new_signals = []
 
     cutoff = datetime.now(timezone.utc) - timedelta(days=CUTOFF_DAYS)
     articles_parsed = 0
@@ -369,7 +400,7 @@ def process_feed(feed_config):
         pub_str = pub_date.strftime("%Y-%m-%d") if pub_date else None
 
         # Check for existing company
-        existing = find_existing(company_name)
+        existing = existing_by_name.get(company_name.lower())
 
         metadata = json.dumps({
             "article_title": title,
@@ -381,7 +412,7 @@ def process_feed(feed_config):
             company_id = existing["id"]
 
             # Skip if signal already exists for this URL
-            if has_signal(company_id, link):
+            if (company_id, link) in existing_signals:
                 continue
 
             updates = {}
@@ -393,7 +424,8 @@ def process_feed(feed_config):
                 updates["geography"] = geo
                 if city:
                     updates["city"] = city
-            update_company(company_id, **updates)
+            update_company(company_id, conn=conn, **updates)
+            existing.update(updates)
         else:
             company_id = insert_company(
                 name=company_name,
@@ -403,20 +435,30 @@ def process_feed(feed_config):
                 city=city,
                 stage="Unknown",
                 heat_score=1,
+                conn=conn,
             )
+            existing_by_name[company_name.lower()] = {
+                "id": company_id, "name": company_name,
+                "description": summary[:500] if summary else None,
+                "sector": sector, "geography": geo, "city": city,
+            }
             new_companies += 1
 
-        insert_signal(
-            company_id=company_id,
-            source_type="rss",
-            source_name=source_name,
-            source_url=link,
-            signal_layer="realtime",
-            title=f"{company_name} — {source_name} mention",
-            metadata=metadata,
-        )
+        new_signals.append({
+            "company_id": company_id,
+            "source_type": "rss",
+            "source_name": source_name,
+            "source_url": link,
+            "signal_layer": "realtime",
+            "title": f"{company_name} — {source_name} mention",
+            "metadata": metadata,
+        })
+        existing_signals.add((company_id, link))
         signals_created += 1
 
+    insert_signals(new_signals, conn=conn)
+    conn.commit()
+
     return articles_parsed, signals_created, new_companies, 0
 
 
@@ -431,8 +473,25 @@ def main():
     total_new = 0
     feed_errors = 0
 
+    # Downloads overlap; storing stays serial on one connection at a time,
+    # so feeds never race to insert the same new company
+    log(f"\n  Fetching {len(FEEDS)} feeds...")
     for feed_config in FEEDS:
-        articles, signals, new, errors = process_feed(feed_config)
+        log(f"    {feed_config['name']}: {feed_config['url']}")
+    with ThreadPoolExecutor(max_workers=len(FEEDS)) as pool:
+        feeds = list(pool.map(fetch_feed, FEEDS))
+    log("")
+
+    # One connection for the whole run. Names and duplicate signals are
+    # resolved in memory, not one query per entry.
+    conn = get_bulk_connection()
+    existing_by_name = get_companies_by_name(conn)
+    existing_signals = get_signal_keys(conn)
+
+    for feed_config, feed in zip(FEEDS, feeds):
+        articles, signals, new, errors = process_feed(
+            feed_config, feed, conn, existing_by_name, existing_signals,
+        )
         total_articles += articles
         total_signals += signals
         total_new += new
@@ -443,6 +502,8 @@ def main():
             f"{signals} company signals extracted, "
             f"{new} new companies [{status}]")
 
+    conn.close()
+
     log(f"\n{'=' * 50}")
     log(f"RSS Feeds: {total_articles} articles total, "
         f"{total_signals} company signals, "
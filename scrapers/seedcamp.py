@@ -7,26 +7,40 @@ and sector CSS classes.
 """
 
 import json
-import re
 import sys
 import os
 
+import lxml.html
 import requests
-from bs4 import BeautifulSoup
-from scrapers import fetch
+from lxml import etree
+from scrapers import compile_sector_rules, fetch, match_sector
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.database import (
     init_db,
-    get_connection,
+    get_bulk_connection,
     insert_company,
-    insert_signal,
-    insert_program,
+    insert_programs,
+    insert_signals,
     update_company,
 )
 
 PAGE_URL = "https://seedcamp.com/our-companies/"
+
+# Every company card: a div with "company__item" among its classes
+COMPANY_CARDS = etree.XPath(
+    "//div[contains(concat(' ', normalize-space(@class), ' '),"
+    " ' company__item ')]"
+)
+
+# (tag, class) of the element inside a card that holds each field
+CARD_FIELDS = {
+    ("span", "company__item__name"): "name",
+    ("div", "company__item__description__content"): "description",
+    ("a", "company__item__link"): "website",
+    ("h6", "company__item__year"): "year",
+}
 HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -63,17 +77,17 @@ SECTOR_RULES = [
                       r"developer", r"infrastructure"]),
 ]
 
+_SECTOR_UNION = compile_sector_rules(SECTOR_RULES)
+
 
 def log(msg):
     print(msg, flush=True)
 
 
-def find_existing(name):
-    conn = get_connection()
+def find_existing(conn, name):
     row = conn.execute(
         "SELECT * FROM companies WHERE LOWER(name) = LOWER(?)", (name,)
     ).fetchone()
-    conn.close()
     return dict(row) if row else None
 
 
@@ -93,13 +107,12 @@ def detect_sector_from_tags(css_classes):
 
 def detect_sector_from_text(text):
     """Fallback keyword-based sector detection from description."""
-    if not text:
-        return "Other"
-    for sector, patterns in SECTOR_RULES:
-        for pat in patterns:
-            if re.search(pat, text, re.IGNORECASE):
-                return sector
-    return "Other"
+    return match_sector(text, _SECTOR_UNION)
+
+
+def _text(el):
+    """Concatenated, stripped text of an element (like bs4 get_text(strip=True))."""
+    return "".join(t.strip() for t in el.itertext())
 
 
 def parse_item(item):
@@ -113,30 +126,35 @@ def parse_item(item):
         "sector": "Other",
     }
 
+    # One walk over the card picks up the first element for each field
+    fields = {}
+    for el in item.iterdescendants("span", "div", "a", "h6"):
+        for cls in el.get("class", "").split():
+            field = CARD_FIELDS.get((el.tag, cls))
+            if field and field not in fields:
+                fields[field] = el
+
     # Name
-    name_el = item.select_one("span.company__item__name")
-    if name_el:
-        result["name"] = name_el.get_text(strip=True)
+    if "name" in fields:
+        result["name"] = _text(fields["name"])
     if not result["name"]:
         return None
 
     # Description
-    desc_el = item.select_one("div.company__item__description__content")
-    if desc_el:
-        result["description"] = desc_el.get_text(strip=True)
+    if "description" in fields:
+        result["description"] = _text(fields["description"])
 
     # Website
-    link = item.select_one("a.company__item__link")
-    if link and link.get("href"):
-        result["website"] = link["href"].strip()
+    href = fields["website"].get("href") if "website" in fields else None
+    if href:
+        result["website"] = href.strip()
 
     # Year
-    year_el = item.select_one("h6.company__item__year")
-    if year_el:
-        result["year"] = year_el.get_text(strip=True)
+    if "year" in fields:
+        result["year"] = _text(fields["year"])
 
     # Sector from CSS tag classes, fallback to description keywords
-    css_classes = item.get("class", [])
+    css_classes = item.get("class", "").split()
     skip = {"company__item", "mix"}
     result["sector_tags"] = [c for c in css_classes if c not in skip]
 
@@ -162,20 +180,27 @@ def main():
         log(f"ERROR: {e}")
         return
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    items = soup.find_all("div", class_="company__item")
+    # Decoded text, not bytes: lxml would otherwise assume Latin-1 when
+    # the page carries no <meta charset>
+    items = COMPANY_CARDS(lxml.html.fromstring(resp.text))
     log(f"  Found {len(items)} company cards")
 
     new_count = 0
     existing_count = 0
 
+    # One connection and one transaction for the whole page; signals and
+    # programs are written with one executemany each after the loop
+    conn = get_bulk_connection()
+    new_signals = []
+    new_programs = []
+
     for item in items:
         data = parse_item(item)
         if data is None:
             continue
 
         name = data["name"]
-        existing = find_existing(name)
+        existing = find_existing(conn, name)
 
         metadata = json.dumps({
             "sector_tags": data["sector_tags"],
@@ -191,7 +216,7 @@ def main():
                 updates["description"] = data["description"]
             if existing.get("sector") in (None, "Other") and data["sector"] != "Other":
                 updates["sector"] = data["sector"]
-            update_company(company_id, **updates)
+            update_company(company_id, conn=conn, **updates)
             existing_count += 1
         else:
             company_id = insert_company(
@@ -202,26 +227,32 @@ def main():
                 website=data["website"],
                 stage="Seed",
                 heat_score=2,
+                conn=conn,
             )
             new_count += 1
 
-        insert_signal(
-            company_id=company_id,
-            source_type="program",
-            source_name="Seedcamp",
-            source_url=PAGE_URL,
-            signal_layer="curated",
-            title=f"{name} — Seedcamp portfolio",
-            metadata=metadata,
-        )
-
-        insert_program(
-            company_id=company_id,
-            program_name="Seedcamp",
-            program_type="Accelerator",
-            program_country="UK",
-            cohort=data["year"],
-        )
+        new_signals.append({
+            "company_id": company_id,
+            "source_type": "program",
+            "source_name": "Seedcamp",
+            "source_url": PAGE_URL,
+            "signal_layer": "curated",
+            "title": f"{name} — Seedcamp portfolio",
+            "metadata": metadata,
+        })
+
+        new_programs.append({
+            "company_id": company_id,
+            "program_name": "Seedcamp",
+            "program_type": "Accelerator",
+            "program_country": "UK",
+            "cohort": data["year"],
+        })
+
+    insert_signals(new_signals, conn=conn)
+    insert_programs(new_programs, conn=conn)
+    conn.commit()
+    conn.close()
 
     log(f"\nSeedcamp: Found {len(items)} companies. "
         f"{new_count} new, {existing_count} already existed.")
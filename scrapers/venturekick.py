@@ -10,20 +10,24 @@ import json
 import re
 import sys
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
+from html import unescape
+from itertools import islice
 
 import requests
-from scrapers import fetch
-from bs4 import BeautifulSoup
+from lxml import etree
+from scrapers import RateLimiter, fetch
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.database import (
     init_db,
+    get_bulk_connection,
+    get_companies_by_name,
     get_connection,
     insert_company,
-    insert_signal,
-    insert_program,
+    insert_programs,
+    insert_signals,
     update_company,
 )
 
@@ -39,7 +43,56 @@ HEADERS = {
     ),
 }
 
-REQUEST_DELAY = 1.5  # seconds between requests
+REQUEST_DELAY = 1.5  # seconds between requests, across threads
+PROFILE_WORKERS = 4  # concurrent profile requests in Phase 2
+AJAX_WORKERS = 4     # AJAX pagination batches requested at once
+BATCH_SIZE = 50      # profiles stored per transaction in Phase 2
+
+
+def _has_class(cls):
+    """XPath predicate matching elements with `cls` among their classes."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+
+# Precompiled selectors for the portfolio cards and profile pages
+COMPANY_HOLDERS = etree.XPath(f".//div[{_has_class('company-holder')}]")
+CARD_H2 = etree.XPath(f".//*[{_has_class('txt-holder')}]//h2")
+CARD_LINK = etree.XPath(f".//*[{_has_class('txt-holder')}]//h2//span//a")
+ALL_ROWS = etree.XPath("//*[@id='all_rows']")
+TAGS_UL = etree.XPath(
+    f"//aside[{_has_class('sub-col')}]//ul[{_has_class('tags')}]"
+)
+SIDEBAR_BOX = etree.XPath(
+    f"//aside[{_has_class('sub-col')}]//div[{_has_class('sub-col-box')}]"
+)
+
+
+def _open_tag(tag, cls):
+    """Regex source for an opening <tag> with `cls` among its classes."""
+    return (rf"<{tag}\b[^>]*\bclass\s*=\s*[\"'][^\"']*"
+            rf"(?<![\w-]){re.escape(cls)}(?![\w-])[^>]*>")
+
+
+# Profile pages are sliced with regexes on the raw HTML instead of being
+# parsed whole: the main-col comments need no DOM, and only the sidebar
+# is handed to lxml
+MAIN_COL_START = re.compile(
+    _open_tag("article", "startup-detail") + ".*?" + _open_tag("div", "main-col"),
+    re.DOTALL | re.IGNORECASE,
+)
+DIV_TOKEN = re.compile(r"<!--.*?-->|<(/?)div\b", re.DOTALL | re.IGNORECASE)
+SUB_COL = re.compile(
+    _open_tag("aside", "sub-col") + r".*?</aside\s*>", re.DOTALL | re.IGNORECASE
+)
+
+COMMENT_RE = re.compile(r'<!--\s*(.*?)\s*-->')
+
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+
+# Spaces out every request to venturekick.ch, across threads; a few may
+# go out together after an idle spell, the average rate stays the same
+_limiter = RateLimiter(REQUEST_DELAY, burst=PROFILE_WORKERS)
 
 # Map VK primary tag categories to Athena sectors
 VK_PRIMARY_SECTOR = {
@@ -101,34 +154,42 @@ def log(msg):
     print(msg, flush=True)
 
 
-def find_existing(name):
-    """Check if company already exists by name (case-insensitive)."""
-    conn = get_connection()
-    row = conn.execute(
-        "SELECT * FROM companies WHERE LOWER(name) = LOWER(?)", (name,)
-    ).fetchone()
-    conn.close()
-    return dict(row) if row else None
+def _strings(el):
+    """All text nodes below el, in document order (comments excluded)."""
+    return el.xpath(".//text()")
+
+
+def _text(el):
+    """Concatenated, stripped text of an element (like bs4 get_text(strip=True))."""
+    return "".join(t.strip() for t in _strings(el))
 
 
 # --- Portfolio listing ---
 
 def parse_company_cards(html):
     """Parse company cards from HTML, returning list of (name, description, profile_url)."""
-    soup = BeautifulSoup(html, "html.parser")
+    root = etree.HTML(html)
+    if root is None:
+        return []
+    return _cards_in(root)
+
+
+def _cards_in(root):
+    """Extract (name, description, profile_url) from the cards below root."""
     results = []
-    for holder in soup.find_all("div", class_="company-holder"):
-        link = holder.select_one(".txt-holder h2 span a")
-        if not link:
+    for holder in COMPANY_HOLDERS(root):
+        links = CARD_LINK(holder)
+        if not links:
             continue
-        name = link.get_text(strip=True)
-        profile_url = link["href"]
+        link = links[0]
+        name = _text(link)
+        profile_url = link.attrib["href"]
 
         # Description is the text node after the <span> inside <h2>
-        h2 = holder.select_one(".txt-holder h2")
+        h2 = CARD_H2(holder)
         desc = ""
         if h2:
-            full_text = h2.get_text(strip=True)
+            full_text = _text(h2[0])
             # Remove the company name prefix
             if full_text.startswith(name):
                 desc = full_text[len(name):].strip()
@@ -137,53 +198,81 @@ def parse_company_cards(html):
     return results
 
 
+def fetch_ajax_batch(row_count):
+    """POST one AJAX pagination request, spaced out by the rate limiter."""
+    _limiter.wait()
+    return fetch(AJAX_URL, method="POST", data={"RowCount": row_count},
+                 headers=HEADERS)
+
+
 def fetch_all_portfolio_cards():
     """Fetch all company cards from the portfolio via initial page + AJAX pagination."""
     all_cards = []
 
     # Initial page
     log("  Fetching portfolio page...")
+    _limiter.wait()
     try:
         resp = fetch(PORTFOLIO_URL, headers=HEADERS)
     except requests.RequestException as e:
         log(f"  ERROR fetching portfolio page: {e}")
         return all_cards
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    all_rows = soup.find(id="all_rows")
+    root = etree.HTML(resp.text)
+    all_rows = ALL_ROWS(root) if root is not None else []
     if all_rows:
-        cards = parse_company_cards(str(all_rows))
+        cards = _cards_in(all_rows[0])
         all_cards.extend(cards)
     log(f"    Initial page: {len(all_cards)} companies")
 
-    # AJAX pagination
+    # AJAX pagination. Once a batch shows how far RowCount moves per
+    # batch, the next AJAX_WORKERS batches are requested together.
+    # Responses are still consumed in order; when the guessed RowCount
+    # turns out wrong, the rest of the guesses are dropped and pagination
+    # continues from the RowCount the site actually returned.
     row_count = 20
+    step = None
     batch = 0
-    while True:
-        batch += 1
-        time.sleep(REQUEST_DELAY)
-        try:
-            resp = fetch(AJAX_URL, method="POST", data={"RowCount": row_count},
-                         headers=HEADERS)
-        except requests.RequestException as e:
-            log(f"  ERROR on AJAX batch {batch}: {e}")
-            break
-
-        cards = parse_company_cards(resp.text)
-        if not cards:
-            break
-        all_cards.extend(cards)
-
-        # Extract next RowCount and check if there are more
-        match = re.search(r'RowCount=(\d+)', resp.text)
-        has_more = '.show-more").show()' in resp.text
-
-        if not has_more or not match:
-            break
-        row_count = int(match.group(1))
-
-        if batch % 10 == 0:
-            log(f"    Batch {batch}: {len(all_cards)} companies so far")
+    with ThreadPoolExecutor(max_workers=AJAX_WORKERS) as pool:
+        while row_count is not None:
+            if step:
+                offsets = [row_count + k * step for k in range(AJAX_WORKERS)]
+            else:
+                offsets = [row_count]
+            pending = {rc: pool.submit(fetch_ajax_batch, rc) for rc in offsets}
+
+            while row_count in pending:
+                batch += 1
+                try:
+                    resp = pending.pop(row_count).result()
+                except requests.RequestException as e:
+                    log(f"  ERROR on AJAX batch {batch}: {e}")
+                    row_count = None
+                    break
+
+                cards = parse_company_cards(resp.text)
+                if not cards:
+                    row_count = None
+                    break
+                all_cards.extend(cards)
+
+                # Extract next RowCount and check if there are more
+                match = re.search(r'RowCount=(\d+)', resp.text)
+                has_more = '.show-more").show()' in resp.text
+
+                if not has_more or not match:
+                    row_count = None
+                    break
+                next_count = int(match.group(1))
+                if next_count > row_count:
+                    step = next_count - row_count
+                row_count = next_count
+
+                if batch % 10 == 0:
+                    log(f"    Batch {batch}: {len(all_cards)} companies so far")
+
+            for future in pending.values():
+                future.cancel()
 
     log(f"    Total: {len(all_cards)} companies found")
     return all_cards
@@ -191,6 +280,25 @@ def fetch_all_portfolio_cards():
 
 # --- Company profile parsing ---
 
+def _main_col_html(html):
+    """Return the raw inner HTML of article.startup-detail div.main-col.
+
+    Finds the closing tag by counting nested <div>s, skipping comments
+    (which may hold HTML). Returns None if there is no main-col.
+    """
+    start = MAIN_COL_START.search(html)
+    if not start:
+        return None
+    depth = 1
+    for token in DIV_TOKEN.finditer(html, start.end()):
+        if token.group(0).startswith("<!--"):
+            continue
+        depth += -1 if token.group(1) else 1
+        if depth == 0:
+            return html[start.end():token.start()]
+    return html[start.end():]
+
+
 def fetch_profile(profile_url):
     """Fetch and parse a company's Venture Kick profile page.
 
@@ -203,7 +311,6 @@ def fetch_profile(profile_url):
         log(f"    WARNING: Failed to fetch {profile_url}: {e}")
         return None
 
-    soup = BeautifulSoup(resp.text, "html.parser")
     result = {
         "website": None,
         "city": None,
@@ -213,11 +320,14 @@ def fetch_profile(profile_url):
         "company_stage": "Grant only",
         "description": None,
     }
+    html = resp.text
 
     # --- Extract structured data from HTML comments in main-col ---
-    main_col = soup.select_one("article.startup-detail div.main-col")
-    if main_col:
-        comments = re.findall(r'<!--\s*(.*?)\s*-->', str(main_col))
+    main_col_html = _main_col_html(html)
+    if main_col_html is not None:
+        # Nothing past [23] is read, so stop scanning there
+        comments = [m.group(1) for m in
+                    islice(COMMENT_RE.finditer(main_col_html), 24)]
         # Comment layout (0-indexed):
         #  [6]  = city
         #  [9]  = website
@@ -237,10 +347,11 @@ def fetch_profile(profile_url):
             result["city"] = comments[6].strip()
 
         if len(comments) > 23 and comments[23].strip():
-            # Clean HTML tags from description
-            desc_html = comments[23].strip()
-            desc_soup = BeautifulSoup(desc_html, "html.parser")
-            result["description"] = desc_soup.get_text(separator=" ", strip=True)
+            # Clean HTML tags from description (often plain text already)
+            text = comments[23].strip()
+            if '<' in text:
+                text = _HTML_TAG_RE.sub(' ', text)
+            result["description"] = _WS_RE.sub(' ', unescape(text)).strip()
         elif len(comments) > 22 and comments[22].strip():
             result["description"] = comments[22].strip()
 
@@ -252,19 +363,24 @@ def fetch_profile(profile_url):
                 result["company_stage"] = company_stage
                 break  # VK_STAGES is ordered highest-first
 
+    sub_col = SUB_COL.search(html)
+    root = etree.HTML(sub_col.group(0)) if sub_col else None
+    if root is None:
+        return result
+
     # --- Sector tags from sidebar ---
-    tags_ul = soup.select_one("aside.sub-col ul.tags")
+    tags_ul = TAGS_UL(root)
     if tags_ul:
-        for li in tags_ul.find_all("li"):
-            tag_text = li.get_text(strip=True)
+        for li in tags_ul[0].iter("li"):
+            tag_text = _text(li)
             if tag_text:
                 result["sector_tags"].append(tag_text)
 
     # --- Fallback: city from sidebar text ---
     if not result["city"]:
-        sidebar = soup.select_one("aside.sub-col div.sub-col-box")
+        sidebar = SIDEBAR_BOX(root)
         if sidebar:
-            text = sidebar.get_text()
+            text = "".join(_strings(sidebar[0]))
             match = re.search(r'Headquarter:\s*(.+?)(?:\n|$)', text)
             if match:
                 result["city"] = match.group(1).strip()
@@ -272,8 +388,23 @@ def fetch_profile(profile_url):
     return result
 
 
+def fetch_profile_polite(profile_url):
+    """fetch_profile, spaced out by the module-wide rate limiter."""
+    _limiter.wait()
+    return fetch_profile(profile_url)
+
+
 # --- Main ---
 
+def store_batch(conn, signals, programs):
+    """Write buffered signal/program rows and commit the transaction."""
+    insert_signals(signals, conn=conn)
+    insert_programs(programs, conn=conn)
+    conn.commit()
+    signals.clear()
+    programs.clear()
+
+
 def get_existing_vk_names():
     """Return set of company names that already have a Venture Kick signal."""
     conn = get_connection()
@@ -320,85 +451,107 @@ def main():
     existing_count = 0
     errors = 0
 
-    for i, (name, card_desc, profile_url) in enumerate(cards, 1):
-        time.sleep(REQUEST_DELAY)
-
-        profile = fetch_profile(profile_url)
-        if profile is None:
-            errors += 1
-            # Still store with card-level data
-            profile = {
-                "website": None, "city": None, "sector_tags": [],
-                "vk_stage": None, "funding_amount": None,
-                "company_stage": "Grant only", "description": None,
-            }
-
-        description = profile["description"] or card_desc
-        sector = map_vk_sector(profile["sector_tags"])
-
-        # Check for existing company
-        existing = find_existing(name)
-
-        if existing:
-            company_id = existing["id"]
-            # Update with richer data if available
-            updates = {}
-            if profile["website"] and not existing.get("website"):
-                updates["website"] = profile["website"]
-            if profile["city"] and not existing.get("city"):
-                updates["city"] = profile["city"]
-            if sector != "Other" and existing.get("sector") not in (
-                "AI / ML", "Fintech", "Climate", "Health / Bio", "SaaS", "Deep Tech",
-            ):
-                updates["sector"] = sector
-            if description and not existing.get("description"):
-                updates["description"] = description
-            if existing.get("geography") in (None, "Unknown"):
-                updates["geography"] = "Switzerland"
-            update_company(company_id, **updates)
-            existing_count += 1
-        else:
-            company_id = insert_company(
-                name=name,
-                description=description,
-                sector=sector,
-                geography="Switzerland",
-                city=profile["city"],
-                website=profile["website"],
-                stage=profile["company_stage"],
-                heat_score=2,
-            )
-            new_count += 1
-
-        # Always add signal
-        insert_signal(
-            company_id=company_id,
-            source_type="program",
-            source_name="Venture Kick",
-            source_url=profile_url,
-            signal_layer="curated",
-            title=f"{name} — Venture Kick portfolio",
-            metadata=json.dumps({
-                "vk_stage": profile["vk_stage"],
-                "funding_amount": profile["funding_amount"],
-                "sector_tags": profile["sector_tags"],
-            }),
-        )
-
-        # Add program entry
-        if profile["vk_stage"]:
-            insert_program(
-                company_id=company_id,
-                program_name="Venture Kick",
-                program_type="Grant",
-                program_country="Switzerland",
-                cohort=profile["vk_stage"],
-                funding_amount=profile["funding_amount"],
-            )
-
-        if i % 50 == 0:
-            log(f"  [{i}/{len(cards)}] processed "
-                f"({new_count} new, {existing_count} existing, {errors} errors)")
+    # One connection; rows are committed every BATCH_SIZE profiles, with
+    # signals and programs written by one executemany each per batch
+    conn = get_bulk_connection()
+    existing_by_name = get_companies_by_name(conn)
+    new_signals = []
+    new_programs = []
+
+    # Profiles are fetched concurrently but consumed in card order, so
+    # rows are stored as they arrive and a crash loses little work
+    with ThreadPoolExecutor(max_workers=PROFILE_WORKERS) as pool:
+        profiles = pool.map(fetch_profile_polite,
+                            [url for _, _, url in cards])
+        for i, ((name, card_desc, profile_url), profile) in enumerate(
+                zip(cards, profiles), 1):
+            if profile is None:
+                errors += 1
+                # Still store with card-level data
+                profile = {
+                    "website": None, "city": None, "sector_tags": [],
+                    "vk_stage": None, "funding_amount": None,
+                    "company_stage": "Grant only", "description": None,
+                }
+
+            description = profile["description"] or card_desc
+            sector = map_vk_sector(profile["sector_tags"])
+
+            # Check for existing company
+            existing = existing_by_name.get(name.lower())
+
+            if existing:
+                company_id = existing["id"]
+                # Update with richer data if available
+                updates = {}
+                if profile["website"] and not existing.get("website"):
+                    updates["website"] = profile["website"]
+                if profile["city"] and not existing.get("city"):
+                    updates["city"] = profile["city"]
+                if sector != "Other" and existing.get("sector") not in (
+                    "AI / ML", "Fintech", "Climate", "Health / Bio", "SaaS", "Deep Tech",
+                ):
+                    updates["sector"] = sector
+                if description and not existing.get("description"):
+                    updates["description"] = description
+                if existing.get("geography") in (None, "Unknown"):
+                    updates["geography"] = "Switzerland"
+                update_company(company_id, conn=conn, **updates)
+                existing.update(updates)
+                existing_count += 1
+            else:
+                company_id = insert_company(
+                    name=name,
+                    description=description,
+                    sector=sector,
+                    geography="Switzerland",
+                    city=profile["city"],
+                    website=profile["website"],
+                    stage=profile["company_stage"],
+                    heat_score=2,
+                    conn=conn,
+                )
+                existing_by_name[name.lower()] = {
+                    "id": company_id, "name": name,
+                    "description": description, "sector": sector,
+                    "geography": "Switzerland", "city": profile["city"],
+                    "website": profile["website"],
+                }
+                new_count += 1
+
+            # Always add signal
+            new_signals.append({
+                "company_id": company_id,
+                "source_type": "program",
+                "source_name": "Venture Kick",
+                "source_url": profile_url,
+                "signal_layer": "curated",
+                "title": f"{name} — Venture Kick portfolio",
+                "metadata": json.dumps({
+                    "vk_stage": profile["vk_stage"],
+                    "funding_amount": profile["funding_amount"],
+                    "sector_tags": profile["sector_tags"],
+                }),
+            })
+
+            # Add program entry
+            if profile["vk_stage"]:
+                new_programs.append({
+                    "company_id": company_id,
+                    "program_name": "Venture Kick",
+                    "program_type": "Grant",
+                    "program_country": "Switzerland",
+                    "cohort": profile["vk_stage"],
+                    "funding_amount": profile["funding_amount"],
+                })
+
+            if i % BATCH_SIZE == 0:
+                store_batch(conn, new_signals, new_programs)
+                log(f"  [{i}/{len(cards)}] processed "
+                    f"({new_count} new, {existing_count} existing, {errors} errors)")
+
+    store_batch(conn, new_signals, new_programs)
+    conn.close()
 
     log(f"\nVenture Kick: Found {len(cards) + skipped} companies total. "
         f"{new_count} new, {existing_count} already existed, {skipped} skipped (resume)."
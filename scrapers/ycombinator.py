@@ -9,27 +9,30 @@ and stores them as curated signals.
 """
 
 import json
-import re
 import sys
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
-from scrapers import fetch
+from scrapers import RateLimiter, compile_sector_rules, fetch, match_sector
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.database import (
     init_db,
-    get_connection,
+    get_bulk_connection,
+    get_companies_by_name,
     insert_company,
-    insert_signal,
-    insert_program,
+    insert_programs,
+    insert_signals,
     update_company,
 )
 
 API_URL = "https://api.ycombinator.com/v0.1/companies"
 
+REQUEST_DELAY = 1.0  # min seconds between API requests, across threads
+PAGE_WORKERS = 4
+
 SECTOR_RULES = [
     ("AI / ML",      [r"\bAI\b", r"\bML\b", r"machine learning", r"\bLLM\b",
                       r"\bGPT\b", r"neural net", r"deep learning",
@@ -44,6 +47,8 @@ SECTOR_RULES = [
                       r"developer", r"infrastructure", r"\bAPI\b"]),
 ]
 
+_SECTOR_UNION = compile_sector_rules(SECTOR_RULES)
+
 # Map YC region names to shorter Athena geography values
 COUNTRY_MAP = {
     "United Kingdom": "UK",
@@ -55,25 +60,10 @@ def log(msg):
     print(msg, flush=True)
 
 
-def find_existing(name):
-    conn = get_connection()
-    row = conn.execute(
-        "SELECT * FROM companies WHERE LOWER(name) = LOWER(?)", (name,)
-    ).fetchone()
-    conn.close()
-    return dict(row) if row else None
-
-
 def detect_sector(one_liner, tags, industries):
     """Keyword-based sector detection from combined text fields."""
     text = " ".join(filter(None, [one_liner] + (tags or []) + (industries or [])))
-    if not text:
-        return "Other"
-    for sector, patterns in SECTOR_RULES:
-        for pat in patterns:
-            if re.search(pat, text, re.IGNORECASE):
-                return sector
-    return "Other"
+    return match_sector(text, _SECTOR_UNION)
 
 
 def parse_geography(regions):
@@ -100,31 +90,50 @@ def parse_city(locations):
     return None
 
 
-def fetch_all_companies():
-    """Paginate through the YC API and return all European company dicts."""
-    all_companies = []
-    page = 1
+_limiter = RateLimiter(REQUEST_DELAY, burst=PAGE_WORKERS)
 
-    while True:
-        log(f"  Fetching page {page}...")
-        try:
-            resp = fetch(API_URL, params={"regions": "Europe", "page": page})
-        except requests.RequestException as e:
-            log(f"  ERROR fetching page {page}: {e}")
-            break
 
-        data = resp.json()
-        companies = data.get("companies", [])
-        total_pages = data.get("totalPages", 1)
+def fetch_page(page):
+    """Fetch one page of European companies, spaced out by the rate limiter."""
+    _limiter.wait()
+    return fetch(API_URL, params={"regions": "Europe", "page": page})
 
-        all_companies.extend(companies)
-        log(f"    Got {len(companies)} companies (page {page}/{total_pages})")
 
-        if page >= total_pages or not data.get("nextPage"):
-            break
+def fetch_all_companies():
+    """Paginate through the YC API and return all European company dicts.
 
-        page += 1
-        time.sleep(1)
+    Page 1 gives totalPages; the remaining pages are then fetched
+    concurrently and consumed in page order.
+    """
+    all_companies = []
+
+    log("  Fetching page 1...")
+    try:
+        data = fetch_page(1).json()
+    except requests.RequestException as e:
+        log(f"  ERROR fetching page 1: {e}")
+        return all_companies
+    total_pages = data.get("totalPages", 1)
+
+    if total_pages > 1 and data.get("nextPage"):
+        log(f"  Fetching pages 2-{total_pages}...")
+    with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as pool:
+        pages = pool.map(fetch_page, range(2, total_pages + 1))
+        page = 1
+        while True:
+            companies = data.get("companies", [])
+            all_companies.extend(companies)
+            log(f"    Got {len(companies)} companies (page {page}/{total_pages})")
+
+            if page >= total_pages or not data.get("nextPage"):
+                break
+
+            page += 1
+            try:
+                data = next(pages).json()
+            except requests.RequestException as e:
+                log(f"  ERROR fetching page {page}: {e}")
+                break
 
     return all_companies
 
@@ -141,6 +150,13 @@ def main():
     new_count = 0
     existing_count = 0
 
+    # One connection and one transaction for all companies; signals and
+    # programs are written with one executemany each after the loop
+    conn = get_bulk_connection()
+    existing_by_name = get_companies_by_name(conn)
+    new_signals = []
+    new_programs = []
+
     for c in companies:
         name = (c.get("name") or "").strip()
         if not name:
@@ -169,7 +185,7 @@ def main():
             "industries": industries,
         })
 
-        existing = find_existing(name)
+        existing = existing_by_name.get(name.lower())
 
         if existing:
             company_id = existing["id"]
@@ -185,7 +201,8 @@ def main():
             if city and not existing.get("city"):
                 updates["city"] = city
             if updates:
-                update_company(company_id, **updates)
+                update_company(company_id, conn=conn, **updates)
+                existing.update(updates)
             existing_count += 1
         else:
             company_id = insert_company(
@@ -197,26 +214,37 @@ def main():
                 website=website,
                 stage="Seed",
                 heat_score=2,
+                conn=conn,
             )
+            existing_by_name[name.lower()] = {
+                "id": company_id, "name": name,
+                "description": one_liner, "sector": sector,
+                "geography": geography, "city": city, "website": website,
+            }
             new_count += 1
 
-        insert_signal(
-            company_id=company_id,
-            source_type="program",
-            source_name="Y Combinator",
-            source_url=yc_url,
-            signal_layer="curated",
-            title=f"{name} — Y Combinator {batch}",
-            metadata=metadata,
-        )
-
-        insert_program(
-            company_id=company_id,
-            program_name="Y Combinator",
-            program_type="Accelerator",
-            cohort=batch,
-            funding_amount="$500k",
-        )
+        new_signals.append({
+            "company_id": company_id,
+            "source_type": "program",
+            "source_name": "Y Combinator",
+            "source_url": yc_url,
+            "signal_layer": "curated",
+            "title": f"{name} — Y Combinator {batch}",
+            "metadata": metadata,
+        })
+
+        new_programs.append({
+            "company_id": company_id,
+            "program_name": "Y Combinator",
+            "program_type": "Accelerator",
+            "cohort": batch,
+            "funding_amount": "$500k",
+        })
+
+    insert_signals(new_signals, conn=conn)
+    insert_programs(new_programs, conn=conn)
+    conn.commit()
+    conn.close()
 
     log(f"\nY Combinator: Found {len(companies)} European companies. "
         f"{new_count} new, {existing_count} already existed.")
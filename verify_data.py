@@ -7,6 +7,7 @@ Usage:
 
 import sys
 import os
+from collections import Counter
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -16,6 +17,7 @@ SOURCES = ["HackerNews", "Venture Kick", "ETH AI Center", "Entrepreneur First",
 
 BAR_CHAR = "█"
 MAX_BAR = 30
+_FULL_BAR = BAR_CHAR * MAX_BAR
 
 
 def bar(count, max_count):
@@ -23,7 +25,22 @@ def bar(count, max_count):
     if max_count == 0:
         return ""
     length = int((count / max_count) * MAX_BAR)
-    return BAR_CHAR * max(length, 1) if count > 0 else ""
+    return _FULL_BAR[:max(length, 1)] if count > 0 else ""
+
+
+def ranked(counts):
+    """Sort (name, count) pairs by count, then name, both descending.
+
+    Matches the order SQLite gives GROUP BY ... ORDER BY cnt DESC.
+    """
+    return sorted(counts, key=lambda r: (r[1], r[0] or ""), reverse=True)
+
+
+def print_counts(rows):
+    """Print (name, count) rows with bars scaled to the largest count."""
+    max_cnt = max((r[1] for r in rows), default=0)
+    for r in rows:
+        print(f"  {r[0]:24s}  {r[1]:>5}  {bar(r[1], max_cnt)}")
 
 
 def section(title):
@@ -36,9 +53,26 @@ def section(title):
 def main():
     conn = get_connection()
 
-    # ── Totals ──
-    total_companies = conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0]
-    total_signals = conn.execute("SELECT COUNT(*) FROM signals").fetchone()[0]
+    # ── Totals and per-column counts: one grouped pass over each table ──
+    source_rows = conn.execute("""
+        SELECT source_name, COUNT(DISTINCT company_id), COUNT(*)
+        FROM signals
+        GROUP BY source_name
+    """).fetchall()
+
+    geo_counts, sector_counts, stage_counts = Counter(), Counter(), Counter()
+    for geo, sec, stg, cnt in conn.execute("""
+        SELECT COALESCE(geography, 'Unknown'), COALESCE(sector, 'Unknown'),
+               COALESCE(stage, 'Unknown'), COUNT(*)
+        FROM companies
+        GROUP BY 1, 2, 3
+    """):
+        geo_counts[geo] += cnt
+        sector_counts[sec] += cnt
+        stage_counts[stg] += cnt
+
+    total_companies = sum(geo_counts.values())
+    total_signals = sum(r[2] for r in source_rows)
     total_programs = conn.execute("SELECT COUNT(*) FROM programs").fetchone()[0]
 
     print()
@@ -51,78 +85,44 @@ def main():
     print(f"  {'Signals':20s}  {total_signals:>6}")
     print(f"  {'Program entries':20s}  {total_programs:>6}")
 
-    # ── Companies per source ──
     section("Companies per Source")
-    rows = conn.execute("""
-        SELECT s.source_name, COUNT(DISTINCT s.company_id) AS cnt
-        FROM signals s
-        GROUP BY s.source_name
-        ORDER BY cnt DESC
-    """).fetchall()
-    max_cnt = max((r[1] for r in rows), default=0)
-    for r in rows:
-        print(f"  {r[0]:24s}  {r[1]:>5}  {bar(r[1], max_cnt)}")
+    print_counts(ranked((r[0], r[1]) for r in source_rows))
 
-    # ── Signals per source ──
     section("Signals per Source")
-    rows = conn.execute("""
-        SELECT source_name, COUNT(*) AS cnt
-        FROM signals
-        GROUP BY source_name
-        ORDER BY cnt DESC
-    """).fetchall()
-    max_cnt = max((r[1] for r in rows), default=0)
-    for r in rows:
-        print(f"  {r[0]:24s}  {r[1]:>5}  {bar(r[1], max_cnt)}")
+    print_counts(ranked((r[0], r[2]) for r in source_rows))
 
-    # ── Companies per geography ──
     section("Companies per Geography")
-    rows = conn.execute("""
-        SELECT COALESCE(geography, 'Unknown') AS geo, COUNT(*) AS cnt
-        FROM companies
-        GROUP BY geo
-        ORDER BY cnt DESC
-    """).fetchall()
-    max_cnt = max((r[1] for r in rows), default=0)
-    for r in rows:
-        print(f"  {r[0]:24s}  {r[1]:>5}  {bar(r[1], max_cnt)}")
+    print_counts(ranked(geo_counts.items()))
 
-    # ── Companies per sector ──
     section("Companies per Sector")
-    rows = conn.execute("""
-        SELECT COALESCE(sector, 'Unknown') AS sec, COUNT(*) AS cnt
-        FROM companies
-        GROUP BY sec
-        ORDER BY cnt DESC
-    """).fetchall()
-    max_cnt = max((r[1] for r in rows), default=0)
-    for r in rows:
-        print(f"  {r[0]:24s}  {r[1]:>5}  {bar(r[1], max_cnt)}")
+    print_counts(ranked(sector_counts.items()))
 
-    # ── Companies per stage ──
     section("Companies per Stage")
-    rows = conn.execute("""
-        SELECT COALESCE(stage, 'Unknown') AS stg, COUNT(*) AS cnt
-        FROM companies
-        GROUP BY stg
-        ORDER BY cnt DESC
-    """).fetchall()
-    max_cnt = max((r[1] for r in rows), default=0)
-    for r in rows:
-        print(f"  {r[0]:24s}  {r[1]:>5}  {bar(r[1], max_cnt)}")
+    print_counts(ranked(stage_counts.items()))
 
     # ── Multi-source companies (cross-layer potential) ──
     section("Top 10 Multi-Source Companies (Cross-Layer)")
+    # Rank by source count first; the source list is only concatenated
+    # for the ten companies shown
     rows = conn.execute("""
-        SELECT c.name, c.sector, c.geography,
-               COUNT(DISTINCT s.source_name) AS source_count,
-               GROUP_CONCAT(DISTINCT s.source_name) AS sources
-        FROM companies c
-        JOIN signals s ON s.company_id = c.id
-        GROUP BY c.id
-        HAVING source_count > 1
-        ORDER BY source_count DESC, c.name
-        LIMIT 10
+        WITH multi AS (
+            SELECT company_id, COUNT(DISTINCT source_name) AS source_count
+            FROM signals
+            GROUP BY company_id
+            HAVING source_count > 1
+        ), top AS (
+            SELECT c.id, c.name, c.sector, c.geography, m.source_count
+            FROM multi m
+            JOIN companies c ON c.id = m.company_id
+            ORDER BY m.source_count DESC, c.name
+            LIMIT 10
+        )
+        SELECT t.name, t.sector, t.geography, t.source_count,
+               (SELECT GROUP_CONCAT(DISTINCT s.source_name)
+                FROM signals s
+                WHERE s.company_id = t.id) AS sources
+        FROM top t
+        ORDER BY t.source_count DESC, t.name
     """).fetchall()
 
     if rows: